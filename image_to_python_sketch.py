@@ -1,89 +1,146 @@
 import argparse
-import textwrap
+import base64
+import io
+import os
 from pathlib import Path
 import runpy
 
 import numpy as np
-from PIL import Image, ImageFilter
+from PIL import Image
 
 
-IMAGE_EXTENSIONS = [
-    "*.png",
-    "*.jpg",
-    "*.jpeg",
-    "*.webp",
-    "*.bmp",
-    "*.gif",
-    "*.tif",
-    "*.tiff",
-]
+IMAGE_EXTENSIONS = {
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".webp",
+    ".bmp",
+    ".gif",
+    ".tif",
+    ".tiff",
+}
+
+# Upper bound on edge points kept in sketch mode, which bounds the generated file size
+MAX_POINTS = 10000
 
 
 def find_latest_image(folder: Path) -> Path:
     """Find the most recently modified image in the given folder."""
-    candidates = []
-    for pattern in IMAGE_EXTENSIONS:
-        candidates.extend(folder.glob(pattern))
-
-    if not candidates:
+    # Single directory pass; DirEntry caches file type and stat results
+    latest = None
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            if not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            if latest is None or mtime > latest[0]:
+                latest = (mtime, Path(entry.path))
+
+    if latest is None:
         raise SystemExit(
             "No image files found in this folder. "
             "Supported extensions: png, jpg, jpeg, webp, bmp, gif, tif, tiff."
         )
 
-    return max(candidates, key=lambda p: p.stat().st_mtime)
+    return latest[1]
 
 
-def image_to_points_sketch(image_path: str, max_size: int = 160):
-    """Open image, resize, detect edges, and return list of edge points."""
-    img = Image.open(image_path).convert("L")  # grayscale
-    img.thumbnail((max_size, max_size))  # keep aspect ratio, max side = max_size
+def sobel_magnitude(arr: np.ndarray) -> np.ndarray:
+    """Return the Sobel gradient magnitude of a 2-D grayscale array."""
+    a = np.pad(arr.astype(np.float32), 1, mode="edge")
+
+    # Separable Sobel: [1, 2, 1] smoothing along one axis, [-1, 0, 1] along the other
+    smooth_rows = a[:-2] + 2 * a[1:-1] + a[2:]
+    gx = smooth_rows[:, 2:] - smooth_rows[:, :-2]
+    smooth_cols = a[:, :-2] + 2 * a[:, 1:-1] + a[:, 2:]
+    gy = smooth_cols[2:] - smooth_cols[:-2]
 
-    # Simple edge detection using Pillow
-    edges = img.filter(ImageFilter.FIND_EDGES)
+    return np.hypot(gx, gy)
 
-    arr = np.array(edges)
-    # Threshold: keep brighter (stronger edge) pixels
-    threshold = float(arr.mean())
-    ys, xs = np.where(arr > threshold)
 
-    points = list(zip(xs.tolist(), ys.tolist()))
+def image_to_points_sketch(image_path: str, max_size: int = 160):
+    """Open image, resize, detect edges, and return an (N, 2) array of edge points."""
+    img = Image.open(image_path)
+    # JPEGs can be decoded straight at 1/2, 1/4 or 1/8 scale; no-op for other formats
+    img.draft("L", (max_size, max_size))
+    img = img.convert("L")  # grayscale
+    # keep aspect ratio, max side = max_size; bilinear is plenty for a sketch source
+    img.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)
+
+    mag = sobel_magnitude(np.asarray(img)).ravel()
+    # Keep the strongest above-average edges, capped so the output size stays bounded
+    k = min(int(np.count_nonzero(mag > mag.mean())), MAX_POINTS)
+    if k:
+        idx = np.sort(np.argpartition(mag, mag.size - k)[mag.size - k:])
+    else:
+        idx = np.empty(0, dtype=np.intp)
+    ys, xs = np.unravel_index(idx, (img.height, img.width))
+
+    # Fill one little-endian uint16 buffer directly; the writers emit it without recasting
+    points = np.empty((idx.size, 2), dtype="<u2")
+    points[:, 0] = xs
+    points[:, 1] = ys
     width, height = img.size
     return (width, height), points
 
 
 def image_to_points_color(image_path: str, max_size: int = 80):
-    """Open image, resize, and return list of (x, y, (r,g,b)) pixels for color mode."""
-    img = Image.open(image_path).convert("RGB")
-    img.thumbnail((max_size, max_size))  # keep aspect ratio
+    """Open image, resize, and quantize it for color mode.
 
-    arr = np.array(img)  # shape (h, w, 3)
-    h, w, _ = arr.shape
+    Returns ``(w, h), indices, palette`` where ``indices`` is an (h, w) uint8
+    array of palette entries and ``palette`` is an (n, 3) uint8 RGB array.
+    """
+    img = Image.open(image_path)
+    img.draft("RGB", (max_size, max_size))  # reduced-scale JPEG decode
+    img = img.convert("RGB")
+    img.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)  # keep aspect ratio
 
-    points = []
-    for y in range(h):
-        for x in range(w):
-            r, g, b = arr[y, x].tolist()
-            points.append((x, y, (r, g, b)))
+    # At most 256 colors, so each pixel fits in one byte
+    quantized = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+    indices = np.array(quantized)  # shape (h, w)
+    h, w = indices.shape
+    n_colors = int(indices.max()) + 1
+    palette = np.array(quantized.getpalette()[: n_colors * 3], dtype=np.uint8).reshape(-1, 3)
 
-    return (w, h), points
+    return (w, h), indices, palette
 
 
-def generate_python_code_sketch(width: int, height: int, points):
-    """Generate Python source code that draws a black-and-white sketch using matplotlib."""
-    code = f'''\
+# Bytes of payload hex/base64-encoded per write() call when streaming generated code
+WRITE_CHUNK_BYTES = 3 * 64 * 1024
+
+
+def _write_hex(fp, data: bytes) -> None:
+    """Write ``data`` as hex digits in WRITE_CHUNK_BYTES pieces."""
+    for i in range(0, len(data), WRITE_CHUNK_BYTES):
+        fp.write(data[i : i + WRITE_CHUNK_BYTES].hex())
+
+
+def write_python_code_sketch(fp, width: int, height: int, points) -> None:
+    """Stream Python source that draws a black-and-white sketch into an open text file."""
+    # Separate little-endian uint16 columns decode straight into plot-ready arrays
+    points = np.asarray(points, dtype="<u2")
+    xs = points[:, 0].tobytes()
+    ys = points[:, 1].tobytes()
+
+    fp.write(f'''\
 import matplotlib.pyplot as plt
+import numpy as np
 
 WIDTH, HEIGHT = {width}, {height}
-POINTS = {points!r}
+# Edge point coordinates, each packed as little-endian uint16
+XS = np.frombuffer(bytes.fromhex("''')
+    _write_hex(fp, xs)
+    fp.write('''"), dtype="<u2")
+YS = HEIGHT - np.frombuffer(bytes.fromhex("''')
+    _write_hex(fp, ys)
+    fp.write('''"), dtype="<u2")  # flip Y so image isn't upside-down
 
 
 def main():
-    xs = [p[0] for p in POINTS]
-    ys = [HEIGHT - p[1] for p in POINTS]  # flip Y so image isn't upside-down
-
     plt.figure(figsize=(WIDTH / 80, HEIGHT / 80), facecolor="white")
-    plt.scatter(xs, ys, s=1, c="black", marker=".", linewidths=0)
+    plt.scatter(XS, YS, s=1, c="black", marker=".", linewidths=0)
     plt.axis("off")
     plt.gca().set_aspect("equal", adjustable="box")
     plt.tight_layout()
@@ -92,30 +149,79 @@ def main():
 
 if __name__ == "__main__":
     main()
-'''
-    return textwrap.dedent(code)
+''')
 
 
-def generate_python_code_color(width: int, height: int, points):
-    """Generate Python source code that draws a color image using matplotlib."""
-    code = f'''\
+def write_python_code_color(fp, width: int, height: int, indices, palette) -> None:
+    """Stream Python source that draws a color image into an open text file."""
+    # A palette PNG stores one byte per pixel plus the small color table
+    img = Image.fromarray(indices, mode="P")
+    img.putpalette(palette.tobytes())
+    png = io.BytesIO()
+    img.save(png, format="PNG")
+    data = png.getbuffer()
+
+    fp.write(f'''\
+import base64
+import io
+
 import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
 
 WIDTH, HEIGHT = {width}, {height}
-# Each point is (x, y, (r, g, b))
-POINTS = {points!r}
+# Palette-indexed pixels stored as a base64-encoded PNG
+IMG_B64 = "''')
+    # Chunks are a multiple of 3 bytes, so each encodes without padding
+    for i in range(0, len(data), WRITE_CHUNK_BYTES):
+        fp.write(base64.b64encode(data[i : i + WRITE_CHUNK_BYTES]).decode("ascii"))
+    fp.write('''"
 
 
 def main():
-    xs = [p[0] for p in POINTS]
-    ys = [HEIGHT - p[1] for p in POINTS]  # flip Y so image isn't upside-down
-    colors = [
-        (rgb[0] / 255.0, rgb[1] / 255.0, rgb[2] / 255.0)
-        for (_, _, rgb) in POINTS
-    ]
+    img = np.array(Image.open(io.BytesIO(base64.b64decode(IMG_B64))).convert("RGB"))
 
     plt.figure(figsize=(WIDTH / 50, HEIGHT / 50), facecolor="white")
-    plt.scatter(xs, ys, s=8, c=colors, marker="s", linewidths=0)
+    plt.imshow(img, interpolation="nearest")
+    plt.axis("off")
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
+''')
+
+
+def generate_python_code_sketch(width: int, height: int, points):
+    """Generate Python source code that draws a black-and-white sketch using matplotlib."""
+    buf = io.StringIO()
+    write_python_code_sketch(buf, width, height, points)
+    return buf.getvalue()
+
+
+def generate_python_code_sketch_compact(width: int, height: int):
+    """Generate a small sketch script that loads its points from a sibling .npy file.
+
+    Save the points next to the script with ``np.save(script.with_suffix(".npy"), points)``.
+    """
+    return f'''\
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+WIDTH, HEIGHT = {width}, {height}
+# (x, y) edge points are stored next to this script as <name>.npy
+POINTS = np.load(Path(__file__).with_suffix(".npy"))
+
+
+def main():
+    xs = POINTS[:, 0]
+    ys = HEIGHT - POINTS[:, 1]  # flip Y so image isn't upside-down
+
+    plt.figure(figsize=(WIDTH / 80, HEIGHT / 80), facecolor="white")
+    plt.scatter(xs, ys, s=1, c="black", marker=".", linewidths=0)
     plt.axis("off")
     plt.gca().set_aspect("equal", adjustable="box")
     plt.tight_layout()
@@ -125,7 +231,13 @@ def main():
 if __name__ == "__main__":
     main()
 '''
-    return textwrap.dedent(code)
+
+
+def generate_python_code_color(width: int, height: int, indices, palette):
+    """Generate Python source code that draws a color image using matplotlib."""
+    buf = io.StringIO()
+    write_python_code_color(buf, width, height, indices, palette)
+    return buf.getvalue()
 
 
 def main():
@@ -164,6 +276,14 @@ def main():
         default="sketch",
         help="Choose 'sketch' (black-and-white edges) or 'color' (colored pixels).",
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help=(
+            "Sketch mode only: store the points in a .npy file next to the output "
+            "and generate a small loader script instead of embedding them."
+        ),
+    )
 
     args = parser.parse_args()
 
@@ -179,17 +299,24 @@ def main():
 
     print(f"Using image: {image_path}")
 
+    out_path = Path(args.out)
+
+    # Process the image before touching out_path, so a failure leaves it intact
     if args.mode == "sketch":
         (w, h), points = image_to_points_sketch(str(image_path), max_size=args.max_size)
-        code = generate_python_code_sketch(w, h, points)
+        if args.compact:
+            np.save(out_path.with_suffix(".npy"), points)
+            out_path.write_text(generate_python_code_sketch_compact(w, h), encoding="utf-8")
+        else:
+            with out_path.open("w", encoding="utf-8") as fp:
+                write_python_code_sketch(fp, w, h, points)
     else:
         # color mode: use a smaller size by default if user left max-size at default
         size = args.max_size if args.max_size != 160 else 80
-        (w, h), points = image_to_points_color(str(image_path), max_size=size)
-        code = generate_python_code_color(w, h, points)
+        (w, h), indices, palette = image_to_points_color(str(image_path), max_size=size)
+        with out_path.open("w", encoding="utf-8") as fp:
+            write_python_code_color(fp, w, h, indices, palette)
 
-    out_path = Path(args.out)
-    out_path.write_text(code, encoding="utf-8")
     print(f"Generated Python file: {out_path}")
     print("Opening drawing window...")
 